@@ -0,0 +1,40 @@
+import os
+import threading
+
+from flask import Flask
+
+from . import db, storage, media
+from . import gallery, student, admin, packaging
+from .db import current_dir
+
+
+# 后台线程（视频处理、展示页预热）在每个进程处理第一个请求时启动：
+# gunicorn --preload时主进程中启动的线程不会随fork进入worker
+def start_background(app):
+    if app.extensions.get('background_pid') == os.getpid():
+        return
+    with app.extensions['background_lock']:
+        if app.extensions.get('background_pid') == os.getpid():
+            return
+        app.extensions['background_pid'] = os.getpid()
+        media.start_workers(app)
+        threading.Thread(target=gallery.warm_page_cache, args=(app,), daemon=True).start()
+
+
+def create_app():
+    app = Flask(__name__, root_path=current_dir)
+    app.config['SECRET_KEY'] = 'xai-submission'
+    # 存储等部署配置：FLASK_STORAGE_BACKEND=s3、FLASK_S3_BUCKET、FLASK_S3_ENDPOINT_URL、FLASK_S3_PUBLIC_URL
+    app.config.from_prefixed_env()
+    db.init_app(app)
+    storage.init_app(app)
+    media.init_app(app)
+
+    app.register_blueprint(gallery.bp)
+    app.register_blueprint(student.bp)
+    app.register_blueprint(admin.bp)
+    app.register_blueprint(packaging.bp)
+
+    app.extensions['background_lock'] = threading.Lock()
+    app.before_request(lambda: start_background(app))
+    return app
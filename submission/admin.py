@@ -0,0 +1,505 @@
+import sqlite3
+import time
+import csv
+import io
+
+from flask import Blueprint, render_template, request, redirect, session, jsonify, Response, stream_with_context
+from flask_paginate import Pagination
+
+from .db import DATABASE, get_db, query_db, update_db, insertMany, bump_version
+from .utils import UPLOAD_FILES, encrypt, getCourseNameById, getCidByGid, admin_is_login, getMenu
+from .storage import get_storage
+
+bp = Blueprint('admin', __name__)
+
+EXPORT_BATCH = 5000
+
+
+# 重置截至日期
+@bp.route('/set_deadline', methods=['post'])
+def set_deadline():
+    courseId = request.form.get('courseId')
+    deadline = f"{request.form.get('year')}/{request.form.get('month')}/{request.form.get('day')} " \
+               f"{request.form.get('hour')}:{request.form.get('minute')}:00"
+    t = int(round(time.mktime(time.strptime(deadline, '%Y/%m/%d %X'))))
+    update_db('update course set deadline=? where courseId=?', [t, int(courseId)])
+    return redirect('/cmanage')
+
+
+@bp.route("/importStatus", methods=['get', 'post'])
+def importStatus():
+    courseId = request.args.get("courseId")
+    if not courseId:
+        return jsonify(False)
+    res = query_db("select list from course where courseId=?", [int(courseId)], True)
+    if res is None or res['list'] == '未导入':
+        return jsonify(False)
+    return jsonify(True)
+
+
+# 导入学生名单
+@bp.route('/import', methods=['post'])
+def import_stuList():  # 导入课程学生名单
+    import pandas as pd  # 仅导入名单时加载
+    courseId = request.form.get('courseId')
+    data = request.files
+    df_list = pd.read_csv(data['stuListFile'], index_col=0)
+    if [df_list.index.name] + [column for column in df_list] != ['group id', 'group member'] or df_list.empty:
+        courses = query_db("select courseId,courseName from course")
+        return render_template('importStuList.html', courses=courses[::-1], info="文件内容不合格")
+    db = get_db()
+    cur = get_db().cursor()
+    try:
+        # 删除该课程原来学生提交的作业（如果有）
+        storage = get_storage()
+        storage.delete_prefix(f'data/{courseId}')
+        storage.delete_prefix(f'media/{courseId}')
+
+        # 删除该课程原来学生的提交记录（如果有）
+        cur.execute('delete from submit where courseId=?', [int(courseId)])
+        cur.execute('delete from manifest where courseId=?', [int(courseId)])
+        cur.execute('delete from video where courseId=?', [int(courseId)])
+
+        # 删除该课程原来的学生（如果有）
+        cur.execute('delete from student where courseId=?', [int(courseId)])
+
+        # 保存名单到数据库
+        df_list.index = df_list.index.astype('str')
+        students = []
+        for groupId in df_list.index:
+            res = query_db('select groupId from student where groupId=?', [groupId], True)
+            new_id = groupId
+            if res is not None:
+                new_id = courseId + new_id
+            student = (int(new_id), encrypt(new_id), df_list.loc[groupId, 'group member'], int(courseId))
+            students.append(student)
+        cur.executemany("insert into student values (?, ?, ?, '-', ?, '未提交')", students)
+
+        # 设置截至时间和导入状态
+        deadline = f"{request.form.get('year')}/{request.form.get('month')}/{request.form.get('day')} " \
+                   f"{request.form.get('hour')}:{request.form.get('minute')}:00"
+        t = int(round(time.mktime(time.strptime(deadline, '%Y/%m/%d %X'))))
+        cur.execute('update course set deadline=?, list=? where courseId=?', [t, '已导入', int(courseId)])
+        bump_version(cur, courseId, menu=True)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+    finally:
+        return redirect('/cmanage')
+
+
+@bp.route('/addOne', methods=['get'])
+def addStudent():
+    db = get_db()
+    cur = get_db().cursor()
+    try:
+        cur.execute("insert into student values (?, ?, ?, '-', ?, '未提交')", (int('2107040107'), encrypt('2107040107'), "叶文萱", int('1003')))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+    return redirect('/')
+
+
+@bp.route('/admin', methods=['post', 'get'])
+def admin_login():  # 管理员登录
+    if request.method == 'POST':
+        username = request.form.get('admin')
+        password = request.form.get('password')
+        admin = query_db("select * from admin where username=? and password=?", [username, encrypt(password)], True)
+        if admin is None:
+            result = {
+                'type': 2,  # 管理员登录
+                'info': "账号或密码错误"
+            }
+            return render_template('login.html', result=result)
+        session['admin_id'] = username
+        return redirect('/management')
+    else:
+        if session.get('admin_id'):
+            return redirect('/management')
+        else:
+            return redirect('/toLogin')
+
+
+@bp.route('/management', methods=['post', 'get'])
+def management(limit=8):
+    if session.get('admin_id'):
+        username = session.get('admin_id')
+        data = query_db("select groupId,member,project,c.courseId,c.courseName,submit from student as stu inner join course c on stu.courseId=c.courseId ")
+        menu = getMenu()
+        data = data[::-1]
+        page = int(request.args.get("page", 1))
+        start = (page - 1) * limit
+        end = page * limit if len(data) > page * limit else len(data)
+        paginate = Pagination(page=page, per_page=limit, total=len(data), css_framework='bootstrap5')
+        return render_template('management.html', data=data[start:end], admin_id=username, menu=menu, paginate=paginate)
+    else:
+        return redirect('/toLogin')
+
+
+# 管理员退出登录
+@bp.route('/admin_logout', methods=['get', 'post'])
+def logout():
+    if session.get('admin_id'):
+        session.pop('admin_id')
+    return redirect('/toLogin')
+
+
+@bp.route('/remove', methods=['post', 'get'])
+def remove():  # 管理员删除小组上传资料
+    if request.method == 'GET':
+        return redirect('/toLogin')
+    if not admin_is_login():     # 管理员未登录
+        return redirect('/toLogin')
+    group_id = request.form.get('group_id')
+    courseId = getCidByGid(int(group_id))
+    # 删除文件
+    storage = get_storage()
+    storage.delete_prefix(f'media/{courseId}/{group_id}')
+    if storage.delete_prefix(f'data/{courseId}/{group_id}'):
+        db = get_db()
+        cur = db.cursor()
+        try:
+            # 修改提交状态
+            cur.execute("update student set submit='未提交' where groupId=?", [int(group_id)])
+            # 删除提交记录
+            cur.execute("delete from submit where groupId=?", [int(group_id)])
+            # 删除文件清单
+            cur.execute("delete from manifest where groupId=?", [int(group_id)])
+            cur.execute("delete from video where groupId=?", [int(group_id)])
+            bump_version(cur, courseId, menu=True)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+        finally:
+            cur.close()
+    return redirect('/show_course?course=' + str(courseId))
+
+
+@bp.route('/manage/upload', methods=['post', 'get'])
+def upload_pro():  # 管理员处上传小组资料（仅作重定向）
+    if request.method == 'GET':
+        return redirect('/toLogin')
+    else:
+        groupId = request.form.get('group_id')
+        session['group_id'] = groupId
+        courseId = getCidByGid(int(groupId))
+        res = query_db('select deadline from course where courseId=?', [int(courseId)], True)
+        my_time = time.localtime(res['deadline'])
+        res_time = [my_time.tm_year, my_time.tm_mon, my_time.tm_mday, my_time.tm_hour, my_time.tm_min]
+        return render_template('upload.html', group_id=groupId, time=res_time)
+
+
+@bp.route('/toAddStu')
+def toAddStudent():  # 去导入学生名单页面
+    if session.get('admin_id'):
+        courses = query_db("select courseId,courseName from course")
+        return render_template('importStuList.html', courses=courses[::-1], info="")
+    else:
+        return redirect('/toLogin')
+
+
+@bp.route('/show_course')
+def show_course(limit=7):  # 显示单个课程的学生名单
+    if (session.get('admin_id')):
+        if request.args.get('course'):
+            course = request.args.get('course')
+            data = query_db('select groupId,member,submit from student where courseId=?', [int(course)])
+
+            # 新增筛选未提交
+            if request.args.get('submit'):
+                data = [item for item in data if item['submit'] == '未提交']
+            print(data)
+            # 分页
+            data = data[::-1]
+            page = int(request.args.get("page", 1))
+            start = (page - 1) * limit
+            end = page * limit if len(data) > page * limit else len(data)
+            paginate = Pagination(page=page, per_page=limit, total=len(data), css_framework='bootstrap5')
+
+            for stu in data:
+                sub = query_db("select subDate from submit where groupId=?", [stu['groupId']], True)
+                stu['subDate'] = '--'
+                if sub is not None:
+                    stu['subDate'] = time.strftime("%Y/%m/%d %X", time.localtime(sub['subDate']))
+
+            # 新增信息汇总
+            res = query_db("select count(*) as total from student where courseId=?", [int(course)], True)
+            total_count = res['total']
+            res = query_db("select count(*) as total from submit where courseId=?", [int(course)], True)
+            sub_count = res['total']
+            noSub_count = total_count - sub_count
+            info = [total_count, sub_count, noSub_count, course, getCourseNameById(int(course))]
+            return render_template('courseOne.html', data=data[start:end], info=info, menu=getMenu(), paginate=paginate)
+        else:
+            return redirect('/management')
+    else:
+        return redirect('/toLogin')
+
+
+# 导出课程提交情况（按groupId分批查询，每批读完即释放读锁，不阻塞提交）
+def export_rows(storage, courseIds):
+    sizes = ', '.join(f"sum(case when m.fileName='{name}' then m.size end)" for _, name in UPLOAD_FILES)
+    placeholders = ','.join('?' * len(courseIds))
+    db = sqlite3.connect(DATABASE)
+    try:
+        lastId = -1
+        while True:
+            cur = db.execute(f'''select stu.groupId, stu.courseId, stu.member, stu.project, stu.submit, sub.subDate, {sizes}
+                                 from student as stu
+                                 left join submit as sub on sub.groupId=stu.groupId
+                                 left join manifest as m on m.groupId=stu.groupId
+                                 where stu.courseId in ({placeholders}) and stu.groupId>?
+                                 group by stu.groupId
+                                 order by stu.groupId
+                                 limit ?''', courseIds + [lastId, EXPORT_BATCH])
+            rows = cur.fetchall()
+            cur.close()
+            if not rows:
+                break
+            lastId = rows[-1][0]
+            yield [fillSizes(storage, row) for row in rows]
+    finally:
+        db.close()
+
+
+# 清单中没有记录的文件（如早期提交）从存储读取大小
+def fillSizes(storage, row):
+    row = list(row)
+    if row[5] is not None and None in row[6:]:
+        sizes = storage.sizes(f'data/{row[1]}/{row[0]}')
+        for i, (_, fileName) in enumerate(UPLOAD_FILES):
+            if row[6 + i] is None:
+                row[6 + i] = sizes.get(f'data/{row[1]}/{row[0]}/{fileName}')
+    return row
+
+
+EXPORT_COLUMNS = ['groupId', 'courseId', 'member', 'project', 'submit', 'subDate'] + \
+                 [field + 'Size' for field, _ in UPLOAD_FILES]
+
+
+# 带BOM的utf-8，Excel打开时中文不乱码
+def export_csv(storage, courseIds):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buf.getvalue().encode('utf-8-sig')
+    buf.seek(0)
+    buf.truncate()
+    for rows in export_rows(storage, courseIds):
+        writer.writerows(rows)
+        yield buf.getvalue().encode('utf-8')
+        buf.seek(0)
+        buf.truncate()
+
+
+def export_parquet(storage, courseIds, pa, pq):
+    schema = pa.schema([('groupId', pa.int64()), ('courseId', pa.int64()), ('member', pa.string()),
+                        ('project', pa.string()), ('submit', pa.string()), ('subDate', pa.int64())] +
+                       [(col, pa.int64()) for col in EXPORT_COLUMNS[6:]])
+    sink = io.BytesIO()
+    writer = pq.ParquetWriter(sink, schema)
+    for rows in export_rows(storage, courseIds):
+        writer.write_table(pa.Table.from_arrays([pa.array(col, type=schema.field(i).type) for i, col in enumerate(zip(*rows))], schema=schema))
+        yield sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+    writer.close()
+    yield sink.getvalue()
+
+
+@bp.route('/export')
+def export():  # 管理员导出课程提交数据（csv/parquet）
+    if not admin_is_login():     # 管理员未登录
+        return redirect('/toLogin')
+    try:
+        courseIds = [int(c) for c in request.args.getlist('courseId')]
+    except ValueError:
+        return jsonify(False)
+    if not courseIds:
+        return jsonify(False)
+    name = '_'.join(str(c) for c in courseIds)
+    if request.args.get('format') == 'parquet':
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            return jsonify(False)
+        resp = Response(stream_with_context(export_parquet(get_storage(), courseIds, pa, pq)), mimetype='application/vnd.apache.parquet')
+        resp.headers['Content-Disposition'] = f'attachment; filename=submission_{name}.parquet'
+        return resp
+    resp = Response(stream_with_context(export_csv(get_storage(), courseIds)), mimetype='text/csv')
+    resp.headers['Content-Disposition'] = f'attachment; filename=submission_{name}.csv'
+    return resp
+
+
+# 课程管理部分
+@bp.route('/cmanage')  # 转到课程管理界面
+def to_course_manage(limit=5):
+    if session.get('admin_id'):
+        courses = query_db('select * from course')
+        # 分页
+        courses = courses[::-1]
+        page = int(request.args.get("page", 1))
+        start = (page - 1) * limit
+        end = page * limit if len(courses) > page * limit else len(courses)
+        paginate = Pagination(page=page, per_page=limit, total=len(courses), css_framework='bootstrap5')
+        courses = courses[start:end]
+        for course in courses:
+            if course['list'] == '未导入':
+                course['ratio'] = '0/0'
+            else:
+                res1 = query_db('select count(*) as total from student where courseId=?', [course['courseId']], True)
+                res2 = query_db('select count(*) as total from student where courseId=? and submit=?', [course['courseId'], '已提交'], True)
+                course['ratio'] = f"{res2['total']}/{res1['total']}"
+            if course['deadline']:
+                course['deadline'] = time.strftime("%Y/%m/%d %H:%M", time.localtime(course['deadline']))
+            else:
+                course['deadline'] = '--'
+        return render_template('coursemanage.html', courses=courses, paginate=paginate)
+    else:
+        return redirect('/toLogin')
+
+
+@bp.route('/toaddcourse')  # 转到添加课程界面
+def to_add_course():
+    if session.get('admin_id'):
+        return render_template('addCourse.html', info="")
+    else:
+        return redirect('/toLogin')
+
+
+@bp.route('/insert_course', methods=['GET', 'POST'])
+def insert_course():  # 单个课程新增
+    if request.method == "GET":
+        return redirect('/toLogin')
+    if not admin_is_login():     # 管理员未登录
+        return redirect('/toLogin')
+    courseName = request.form.get('courseName')
+    schoolYear = request.form.get('schoolYear')
+    term = request.form.get('term')
+    grade = request.form.get('grade')
+    update_db("insert into course values(NULL, ?, ?, ?, ?, '未导入', NULL)", [courseName, schoolYear, term, grade])
+    return redirect('/cmanage')
+
+
+@bp.route('/listin_course', methods=['GET', 'POST'])
+def insert_course_list():  # 多个课程新增（文件）
+    if request.method == "GET":
+        return redirect('/toLogin')
+    if not admin_is_login():     # 管理员未登录
+        return redirect('/toLogin')
+    import pandas as pd  # 仅导入课程时加载
+    data = request.files
+    df = pd.read_csv(data['courseList'])
+    if [column for column in df] != ['courseName', 'schoolYear', 'term', 'grade']:
+        return render_template('addCourse.html', info="文件内容不正确，添加失败")
+    courses = []
+    for i, row in df.iterrows():
+        course = (row['courseName'], row['schoolYear'], row['term'], row['grade'])
+        courses.append(course)
+    if len(courses):
+        insertMany("insert into course values (NULL, ?, ?, ?, ?, '未导入', NULL)", courses)
+    return redirect('/cmanage')
+
+
+@bp.route('/removeCourse', methods=['GET', 'POST'])
+def removeCourse():  # 删除整个课程
+    if request.method == "GET":
+        return redirect('/toLogin')
+    if not admin_is_login():     # 管理员未登录
+        return redirect('/toLogin')
+    courseId = request.form.get('courseId')
+    db = get_db()
+    cur = get_db().cursor()
+    try:
+        # 删除course中的记录
+        cur.execute("delete from course where courseId=?", [int(courseId)])
+
+        # 删除提交记录submit
+        cur.execute("delete from submit where courseId=?", [int(courseId)])
+        cur.execute("delete from manifest where courseId=?", [int(courseId)])
+        cur.execute("delete from video where courseId=?", [int(courseId)])
+
+        # 删除课程为courseId的学生账号
+        cur.execute("delete from student where courseId=?", [int(courseId)])
+
+        # 删除打包
+        cur.execute("delete from package where courseId=?", [int(courseId)])
+        bump_version(cur, courseId, menu=True)
+        db.commit()
+        # 删除提交资料data
+        storage = get_storage()
+        storage.delete_prefix(f'data/{courseId}')
+        storage.delete_prefix(f'media/{courseId}')
+        storage.delete(f'package/{courseId}.zip')
+    except Exception as e:
+        db.rollback()
+    finally:
+        cur.close()
+        return redirect('/cmanage')
+
+
+@bp.route('/toChangeCourse')
+def toChangeCourse():
+    if request.args.get('course'):
+        courseId = request.args.get('course')
+        course = query_db("select courseName,schoolYear,term,grade from course where courseId=?", [int(courseId)], True)
+        if course is None:
+            return redirect('/cmanage')
+        str_list = course['schoolYear'].split('-')
+        courseInfo = [courseId, course['courseName'], str_list[0], str_list[1],
+                     course['term'], course['grade']]
+        return render_template('changeCourse.html', courseInfo=courseInfo)
+    else:
+        return redirect('/cmanage')
+
+
+@bp.route('/changeCourse', methods=['GET', 'POST'])
+def changeCourse():
+    if session.get("admin_id"):
+        courseId = request.form.get('courseId')
+        courseName = request.form.get('courseName')
+        schoolYear = request.form.get('schoolYear')
+        term = request.form.get('term')
+        grade = request.form.get('grade')
+
+        # 修改course
+        db = get_db()
+        cur = db.cursor()
+        try:
+            cur.execute("update course set courseName=?,schoolYear=?,term=?,grade=? where courseId=?", [courseName, schoolYear, term, grade, int(courseId)])
+            bump_version(cur, courseId, menu=True)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+        finally:
+            cur.close()
+        return redirect('/cmanage')
+    else:
+        return redirect("/toLogin")
+
+
+@bp.route("/toReset", methods=['GET', 'POST'])
+def toReset():
+    if session.get("admin_id"):
+        return render_template("reset.html", adminId=session.get("admin_id"), status="")
+    else:
+        return redirect("/toLogin")
+
+
+@bp.route("/resetAdmin", methods=['POST'])
+def resetAdmin():
+    if session.get("admin_id"):
+        username = request.form.get("username")
+        password = request.form.get("password")
+        origin = session.get("admin_id")
+        admin = query_db("select username from admin where username=?", [origin], True)
+        if admin is None:
+            return redirect("/toLogin")
+        else:
+            update_db("update admin set username=?,password=? where username=?", [username, encrypt(password), origin])
+            session['admin_id'] = username
+            return render_template("reset.html", adminId=username, status="重置成功")
+    else:
+        return redirect("/toLogin")
@@ -0,0 +1,114 @@
+import sqlite3
+import os
+
+from flask import g
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATABASE = os.environ.get('SUBMISSION_DB', os.path.join(current_dir, 'submission.db'))
+
+
+def init_db():
+    db = sqlite3.connect(DATABASE)
+    # 展示页内容版本号（courseId为0表示课程菜单）
+    db.execute('''create table if not exists page_version (
+        courseId INTEGER primary key,
+        version INTEGER
+    )''')
+    # 提交文件清单（大小、类型、sha256校验值）
+    db.execute('''create table if not exists manifest (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        groupId bigint(20),
+        courseId INTEGER,
+        fileName varchar(32),
+        size bigint(20),
+        contentType varchar(128),
+        sha256 char(64),
+        saveDate bigint(15),
+        unique (groupId, fileName)
+    )''')
+    # 打包任务租约（同一主机的多个进程间只由一个执行）
+    db.execute('''create table if not exists package_lease (
+        courseId INTEGER primary key,
+        owner varchar(32),
+        leaseUntil bigint(15)
+    )''')
+    # 视频处理状态（source为原视频sha256，重新上传后旧任务结果作废）
+    db.execute('''create table if not exists video (
+        groupId bigint(20) primary key,
+        courseId INTEGER,
+        source char(64),
+        status varchar(8),
+        procDate bigint(15)
+    )''')
+    # 视频处理任务租约
+    db.execute('''create table if not exists video_lease (
+        groupId bigint(20) primary key,
+        owner varchar(32),
+        leaseUntil bigint(15)
+    )''')
+    # 导出时按小组关联提交记录
+    db.execute('create index if not exists submit_group on submit(groupId)')
+    db.commit()
+    db.close()
+
+
+def make_dicts(cursor, row):
+    return dict((cursor.description[idx][0], value)
+                for idx, value in enumerate(row))
+
+
+def get_db():
+    db = getattr(g, '_database', None)
+    if db is None:
+        db = g._database = sqlite3.connect(DATABASE)
+    db.row_factory = make_dicts
+    return db
+
+
+def close_connection(exception):
+    db = getattr(g, '_database', None)
+    if db is not None:
+        db.close()
+
+
+def init_app(app):
+    init_db()
+    app.teardown_appcontext(close_connection)
+
+
+# 查询方法
+def query_db(query, args=(), one=False):
+    cur = get_db().execute(query, args)
+    rv = cur.fetchall()
+    cur.close()
+    return (rv[0] if rv else None) if one else rv
+
+
+# 更新
+def update_db(sql, args=()):
+    db = get_db()
+    cur = get_db().cursor()
+    cur.execute(sql, args)
+    db.commit()
+    cur.close()
+
+
+# 插入
+def insertMany(sql, data):
+    db = get_db()
+    cur = get_db().cursor()
+    try:
+        cur.executemany(sql, data)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+    finally:
+        cur.close()
+
+
+# 展示内容变化时更新版本号（与数据修改处于同一事务）
+def bump_version(cur, courseId, menu=False):
+    ids = [int(courseId), 0] if menu else [int(courseId)]
+    for cid in ids:
+        cur.execute('''insert into page_version values (?, 1)
+                       on conflict(courseId) do update set version=version+1''', [cid])
@@ -0,0 +1,151 @@
+import time
+import hashlib
+import threading
+import gzip
+from collections import OrderedDict
+
+from flask import Blueprint, render_template, request, redirect, Response
+
+from .db import query_db
+from .utils import getAllSubCourses, getCourseNameById, getMenu
+from .media import OPTIMIZED, mediaKey
+from .storage import get_storage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+bp = Blueprint('gallery', __name__)
+
+# 展示页缓存：key为('home', courseId)或('index', None)，value为渲染结果及其压缩版本
+# 按最近使用淘汰，只缓存有提交记录的课程
+PAGE_CACHE_SIZE = 256
+page_cache = OrderedDict()
+page_cache_lock = threading.Lock()
+
+
+# 获取展示页的当前版本
+def getPageVersion(courseId=None):
+    if courseId is None:
+        res = query_db('select total(version) as version from page_version', one=True)
+        return str(int(res['version']))
+    res = query_db('select courseId, version from page_version where courseId in (?, 0)', [int(courseId)])
+    versions = dict((r['courseId'], r['version']) for r in res)
+    return f"{versions.get(int(courseId), 0)}-{versions.get(0, 0)}"
+
+
+# 取缓存的展示页，版本不一致时重新渲染
+def cached_page(key, version, render):
+    with page_cache_lock:
+        entry = page_cache.get(key)
+        if entry is not None:
+            page_cache.move_to_end(key)
+    if entry is None or entry['version'] != version:
+        html = render().encode('utf-8')
+        entry = {
+            'version': version,
+            # 按页面内容计算，模板或存储配置变化后旧ETag不再命中
+            'etag': hashlib.md5(html).hexdigest(),
+            'identity': html,
+            'gzip': gzip.compress(html, 6),
+            'br': brotli.compress(html) if brotli is not None else None,
+        }
+        with page_cache_lock:
+            page_cache[key] = entry
+            page_cache.move_to_end(key)
+            while len(page_cache) > PAGE_CACHE_SIZE:
+                page_cache.popitem(last=False)
+    return entry
+
+
+# 根据Accept-Encoding返回预压缩的展示页
+def page_response(entry):
+    if request.if_none_match.contains(entry['etag']):
+        resp = Response(status=304)
+    else:
+        encoding = 'identity'
+        if entry['br'] is not None and request.accept_encodings['br']:
+            encoding = 'br'
+        elif request.accept_encodings['gzip']:
+            encoding = 'gzip'
+        resp = Response(entry[encoding], mimetype='text/html')
+        if encoding != 'identity':
+            resp.headers['Content-Encoding'] = encoding
+    resp.set_etag(entry['etag'])
+    resp.headers['Vary'] = 'Accept-Encoding'
+    return resp
+
+
+# 视频链接：处理完成的使用media/下的优化版本，否则使用原文件
+def setVideoKey(courseId, subList):
+    for sub in subList:
+        source = sub.pop('videoSource')
+        if sub.pop('videoStatus') == OPTIMIZED:
+            sub['video'] = mediaKey(courseId, sub['groupId'], source)
+        else:
+            sub['video'] = f"data/{courseId}/{sub['groupId']}/main.mp4"
+    return subList
+
+
+def render_index():
+    lst = getAllSubCourses()
+    for c in lst:
+        c['subList'] = setVideoKey(c['courseId'], query_db('''select sub.groupId, stu.member, stu.project, v.status as videoStatus, v.source as videoSource
+                                   from student as stu inner join submit as sub on stu.groupId=sub.groupId
+                                   left join video as v on v.groupId=sub.groupId
+                                   where sub.courseId=? 
+                                   order by sub.subDate desc limit 3''', [c['courseId']]))
+    menu = getMenu(False)
+    return render_template('temp.html', length=len(lst), lst=lst[::-1], menu=menu)
+
+
+def render_home(course):
+    courseName = getCourseNameById(int(course))
+    menu = getMenu(False)
+
+    res = setVideoKey(course, query_db('''select sub.groupId, stu.member, stu.project, v.status as videoStatus, v.source as videoSource
+                                       from student as stu inner join submit as sub on stu.groupId=sub.groupId
+                                       left join video as v on v.groupId=sub.groupId
+                                       where sub.courseId=? 
+                                       order by sub.subDate desc''', [int(course)]))
+    return render_template('home.html', data=res, data_length=len(res), course=course, courseName=courseName, menu=menu)
+
+
+# 预热已截止课程的展示页
+def warm_page_cache(app):
+    with app.app_context():
+        cached_page(('index', None), getPageVersion(), render_index)
+        courses = query_db('''select courseId from course
+                              where deadline<=? and courseId in (select distinct courseId from submit)''',
+                           [int(round(time.time()))])
+        for c in courses:
+            course = str(c['courseId'])
+            cached_page(('home', course), getPageVersion(course), lambda: render_home(course))
+
+
+@bp.route('/')
+def index():  # 程序入口
+    entry = cached_page(('index', None), getPageVersion(), render_index)
+    return page_response(entry)
+
+
+@bp.route('/home')
+def home():  # 去作业展示页
+    course = request.args.get('course')
+    if not course or not course.isdigit():
+        return redirect('/')
+    course = str(int(course))
+    if query_db('select courseId from course where courseId=?', [int(course)], True) is None:
+        return redirect('/')
+    if query_db('select groupId from submit where courseId=? limit 1', [int(course)], True) is None:
+        return render_home(course)  # 无提交记录的课程不缓存
+    entry = cached_page(('home', course), getPageVersion(course), lambda: render_home(course))
+    return page_response(entry)
+
+
+@bp.route('/files/<path:key>')
+def files(key):  # 对象存储中的提交资料（跳转到临时签名地址）
+    if not key.startswith(('data/', 'media/', 'package/')):
+        return redirect('/')
+    return redirect(get_storage().presign(key))
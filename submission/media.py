@@ -0,0 +1,242 @@
+import sqlite3
+import time
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import threading
+import uuid
+from contextlib import closing
+
+from .db import DATABASE, bump_version
+from .storage import CHUNK_SIZE
+
+# 视频处理状态
+PENDING = '处理中'
+OPTIMIZED = '已优化'
+UNCHANGED = '无需优化'
+FAILED = '失败'
+
+# 未被唤醒时的轮询间隔；租约在转码超时之外留出余量
+POLL_SECONDS = 30
+LEASE_MARGIN = 300
+
+# 需要递归查找stco/co64的容器box
+CONTAINERS = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+
+
+# 读取顶层box，返回[(类型, 偏移, 大小)]
+def read_boxes(f):
+    f.seek(0, os.SEEK_END)
+    end = f.tell()
+    boxes = []
+    pos = 0
+    while pos < end:
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            raise ValueError('truncated box header')
+        size, btype = struct.unpack('>I4s', header)
+        if size == 1:
+            size = struct.unpack('>Q', f.read(8))[0]
+        elif size == 0:
+            size = end - pos
+        if size < 8 or pos + size > end:
+            raise ValueError('invalid box size')
+        boxes.append((btype, pos, size))
+        pos += size
+    return boxes
+
+
+# moov前移后修正stco/co64中位于start之后的块偏移
+def patch_offsets(moov, start, delta):
+    def walk(pos, end):
+        while pos + 8 <= end:
+            size, btype = struct.unpack_from('>I4s', moov, pos)
+            header = 8
+            if size == 1:
+                size = struct.unpack_from('>Q', moov, pos + 8)[0]
+                header = 16
+            elif size == 0:
+                size = end - pos
+            if size < header or pos + size > end:
+                raise ValueError('invalid box size')
+            if btype == b'cmov':
+                raise ValueError('compressed moov')
+            if btype in CONTAINERS:
+                walk(pos + header, pos + size)
+            elif btype in (b'stco', b'co64'):
+                fmt, width = ('>I', 4) if btype == b'stco' else ('>Q', 8)
+                count = struct.unpack_from('>I', moov, pos + header + 4)[0]
+                table = pos + header + 8
+                if table + count * width > pos + size:
+                    raise ValueError('invalid chunk offset table')
+                for i in range(count):
+                    offset = struct.unpack_from(fmt, moov, table + i * width)[0]
+                    if offset >= start:
+                        offset += delta
+                        if btype == b'stco' and offset > 0xFFFFFFFF:
+                            raise ValueError('chunk offset overflow')
+                        struct.pack_into(fmt, moov, table + i * width, offset)
+            pos += size
+
+    walk(16 if struct.unpack_from('>I', moov, 0)[0] == 1 else 8, len(moov))
+
+
+def copy_range(src, dst, offset, size):
+    src.seek(offset)
+    while size > 0:
+        chunk = src.read(min(CHUNK_SIZE, size))
+        if not chunk:
+            raise ValueError('unexpected end of file')
+        dst.write(chunk)
+        size -= len(chunk)
+
+
+# 将moov移到mdat之前（faststart），已是faststart时返回False
+def faststart(srcPath, dstPath):
+    with open(srcPath, 'rb') as src:
+        boxes = read_boxes(src)
+        types = [b[0] for b in boxes]
+        if b'moov' not in types or b'mdat' not in types:
+            raise ValueError('not an mp4 file')
+        moov_i = types.index(b'moov')
+        mdat_i = types.index(b'mdat')
+        if moov_i < mdat_i:
+            return False
+        _, moov_offset, moov_size = boxes[moov_i]
+        src.seek(moov_offset)
+        moov = bytearray(src.read(moov_size))
+        patch_offsets(moov, boxes[mdat_i][1], moov_size)
+        with open(dstPath, 'wb') as dst:
+            for i, (btype, offset, size) in enumerate(boxes):
+                if i == mdat_i:
+                    dst.write(moov)
+                if i != moov_i:
+                    copy_range(src, dst, offset, size)
+    return True
+
+
+# 使用本地编码器限制码率转码（同时输出faststart）
+def transcode(encoder, srcPath, dstPath, maxBitrate, timeout):
+    subprocess.run([encoder, '-y', '-v', 'error', '-i', srcPath,
+                    '-c:v', 'libx264', '-preset', 'fast', '-maxrate', maxBitrate, '-bufsize', maxBitrate,
+                    '-c:a', 'aac', '-movflags', '+faststart', dstPath],
+                   check=True, timeout=timeout, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def mediaKey(courseId, groupId, source):
+    return f'media/{courseId}/{groupId}/{source}.mp4'
+
+
+# 后台处理小组的main.mp4，结果按原视频sha256保存到media/下，原文件保留
+def process_video(storage, courseId, groupId, source, encoder=None, maxBitrate=None, timeout=1800):
+    status = FAILED
+    srcPath = dstPath = None
+    try:
+        with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as tmp:
+            srcPath = tmp.name
+            with closing(storage.open(f'data/{courseId}/{groupId}/main.mp4')) as f:
+                shutil.copyfileobj(f, tmp, CHUNK_SIZE)
+        dstPath = srcPath + '.out.mp4'
+        rewritten = False
+        if encoder and maxBitrate:
+            try:
+                transcode(encoder, srcPath, dstPath, maxBitrate, timeout)
+                rewritten = True
+            except (OSError, subprocess.CalledProcessError, subprocess.TimeoutExpired):
+                rewritten = False   # 转码失败时退回faststart
+        if not rewritten:
+            rewritten = faststart(srcPath, dstPath)
+        if rewritten:
+            storage.save_path(mediaKey(courseId, groupId, source), dstPath)
+            status = OPTIMIZED
+        else:
+            status = UNCHANGED
+    except (ValueError, struct.error, OSError):
+        status = FAILED
+    finally:
+        for path in (srcPath, dstPath):
+            if path and os.path.exists(path):
+                os.remove(path)
+        db = sqlite3.connect(DATABASE)
+        try:
+            # 处理期间重新上传过的视频不更新
+            cur = db.execute("update video set status=?, procDate=? where groupId=? and source=?",
+                             [status, int(round(time.time())), int(groupId), source])
+            current = cur.rowcount == 1
+            if current:
+                bump_version(cur, courseId)
+            db.commit()
+        finally:
+            db.close()
+        # 仍是当前视频时删除旧版本的输出，否则删除自己的输出
+        key = mediaKey(courseId, groupId, source)
+        for other in storage.list(f'media/{courseId}/{groupId}'):
+            if (other != key) if current else (other == key):
+                storage.delete(other)
+
+
+# 通过数据库租约认领视频处理任务（与打包任务相同），进程重启后未完成的任务在租约过期后重新处理
+def claim_video(groupId, owner, seconds):
+    now = int(time.time())
+    db = sqlite3.connect(DATABASE)
+    try:
+        cur = db.execute('''insert into video_lease values (?, ?, ?)
+                            on conflict(groupId) do update set owner=excluded.owner, leaseUntil=excluded.leaseUntil
+                            where video_lease.leaseUntil<?''', [int(groupId), owner, now + seconds, now])
+        db.commit()
+        return cur.rowcount == 1
+    finally:
+        db.close()
+
+
+def release_video(groupId, owner):
+    db = sqlite3.connect(DATABASE)
+    try:
+        db.execute("delete from video_lease where groupId=? and owner=?", [int(groupId), owner])
+        db.commit()
+    finally:
+        db.close()
+
+
+# 处理线程：状态为处理中的记录即任务队列
+def video_worker(storage, wakeup, encoder, maxBitrate, timeout):
+    owner = uuid.uuid4().hex
+    while True:
+        processed = False
+        try:
+            db = sqlite3.connect(DATABASE)
+            try:
+                jobs = db.execute("select groupId, courseId, source from video where status=? order by groupId",
+                                  [PENDING]).fetchall()
+            finally:
+                db.close()
+            for groupId, courseId, source in jobs:
+                if not claim_video(groupId, owner, timeout + LEASE_MARGIN):
+                    continue
+                try:
+                    process_video(storage, courseId, groupId, source, encoder, maxBitrate, timeout)
+                finally:
+                    release_video(groupId, owner)
+                processed = True
+        except Exception as e:
+            processed = False
+        if not processed:
+            wakeup.wait(POLL_SECONDS)
+            wakeup.clear()
+
+
+def init_app(app):
+    app.extensions['video_wakeup'] = threading.Event()
+
+
+# 启动固定数量的处理线程（每个进程一次），上传后通过wakeup唤醒
+def start_workers(app):
+    wakeup = app.extensions['video_wakeup']
+    encoder = shutil.which(app.config.get('VIDEO_ENCODER', 'ffmpeg'))
+    for i in range(int(app.config.get('VIDEO_WORKERS', 1))):
+        threading.Thread(target=video_worker, daemon=True,
+                         args=(app.extensions['storage'], wakeup, encoder, app.config.get('VIDEO_MAX_BITRATE'),
+                               int(app.config.get('VIDEO_TIMEOUT', 1800)))).start()
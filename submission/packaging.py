@@ -0,0 +1,140 @@
+import sqlite3
+import time
+import os
+import shutil
+import tempfile
+import uuid
+import mimetypes
+import zipfile
+import threading
+from contextlib import closing
+
+from flask import Blueprint, request, redirect, jsonify
+
+from .db import DATABASE, query_db, update_db
+from .storage import CHUNK_SIZE, HashingReader, get_storage
+from .utils import UPLOAD_FILES
+
+bp = Blueprint('packaging', __name__)
+
+LEASE_SECONDS = 600
+
+
+# 通过数据库租约认领打包任务，同时请求时只有一个执行（租约过期可被重新认领）
+# 租约依赖SQLite文件锁：仅在同一主机的多个进程间可靠，经网络文件系统共享的SQLite不受支持
+def claim_package(courseId, owner):
+    now = int(time.time())
+    db = sqlite3.connect(DATABASE)
+    try:
+        cur = db.execute('''insert into package_lease values (?, ?, ?)
+                            on conflict(courseId) do update set owner=excluded.owner, leaseUntil=excluded.leaseUntil
+                            where package_lease.leaseUntil<?''', [int(courseId), owner, now + LEASE_SECONDS, now])
+        claimed = cur.rowcount == 1
+        if claimed:
+            db.execute("update package set packaged=0 where courseId=?", [int(courseId)])
+        db.commit()
+        return claimed
+    finally:
+        db.close()
+
+
+# 续租，返回是否仍持有租约
+def renew_lease(db, courseId, owner):
+    cur = db.execute("update package_lease set leaseUntil=? where courseId=? and owner=?",
+                     [int(time.time()) + LEASE_SECONDS, int(courseId), owner])
+    db.commit()
+    return cur.rowcount == 1
+
+
+def set_packaged(db, courseId, packaged):
+    res = db.execute("select packaged from package where courseId=? limit 1", [int(courseId)]).fetchall()
+    if not len(res):
+        # packaged : 0:未打包，1:已打包，2:打包失败
+        db.execute("insert into package values (NULL, ?, ?)", [int(courseId), packaged])
+    else:
+        db.execute("update package set packaged=? where courseId=?", [packaged, int(courseId)])
+
+
+def package(storage, courseId, owner):
+    prefix = f'data/{courseId}'
+    db = sqlite3.connect(DATABASE)
+    tmp = tempfile.NamedTemporaryFile(suffix='.zip', delete=False)
+    owned = True
+    packaged = 2
+    try:
+        # 优先使用上传时记录的校验值，清单中没有的文件（如早期提交）在打包时顺带计算并补录
+        rows = db.execute("select groupId, fileName, sha256 from manifest where courseId=?", [int(courseId)]).fetchall()
+        known = dict((f'{groupId}/{fileName}', sha256) for groupId, fileName, sha256 in rows)
+        fileNames = [fileName for _, fileName in UPLOAD_FILES]
+        sums = {}
+        with tmp, zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zip:
+            for key in storage.list(prefix):
+                name = key[len(prefix) + 1:]
+                with closing(storage.open(key)) as src, zip.open(name, 'w', force_zip64=True) as dst:
+                    if name in known:
+                        shutil.copyfileobj(src, dst, CHUNK_SIZE)
+                        sums[name] = known[name]
+                    else:
+                        reader = HashingReader(src)
+                        shutil.copyfileobj(reader, dst, CHUNK_SIZE)
+                        sums[name] = reader.sha.hexdigest()
+                        groupId, _, fileName = name.partition('/')
+                        if groupId.isdigit() and fileName in fileNames:
+                            db.execute('insert or ignore into manifest values (NULL, ?, ?, ?, ?, ?, ?, ?)',
+                                       [int(groupId), int(courseId), fileName, reader.size,
+                                        mimetypes.guess_type(fileName)[0], sums[name], int(round(time.time()))])
+                # 租约已过期并被其他节点认领时停止打包
+                owned = renew_lease(db, courseId, owner)
+                if not owned:
+                    return
+            zip.writestr('SHA256SUMS', ''.join(f'{sums[name]}  {name}\n' for name in sorted(sums)))
+        # 仅在仍持有租约时写入打包结果
+        owned = renew_lease(db, courseId, owner)
+        if not owned:
+            return
+        storage.save_path(f'package/{courseId}.zip', tmp.name)
+        packaged = 1
+    finally:
+        if os.path.exists(tmp.name):
+            os.remove(tmp.name)
+        if owned:
+            set_packaged(db, courseId, packaged)
+            # 释放租约
+            db.execute("delete from package_lease where courseId=? and owner=?", [int(courseId), owner])
+        db.commit()
+        db.close()
+
+
+@bp.route('/package', methods=['GET', 'POST'])
+def packageData():
+    courseId = request.args.get('courseId')
+    if not courseId:
+        return jsonify(False)
+    owner = uuid.uuid4().hex
+    if claim_package(courseId, owner):
+        t = threading.Thread(target=package, args=(get_storage(), courseId, owner))
+        t.start()
+    return jsonify(True)
+
+
+@bp.route('/packStatus', methods=['GET', 'POST'])
+def packStatus():
+    courseId = request.args.get("courseId")
+    if not courseId:
+        return jsonify(False)
+    res = query_db("select packaged from package where courseId=?", [int(courseId)], True)
+    if res is None:
+        return jsonify(False)
+    if res['packaged'] == 1 and get_storage().exists(f'package/{courseId}.zip'):
+        return jsonify(True)
+    return jsonify(False)
+
+
+@bp.route('/delPackage', methods=['GET', 'POST'])
+def delPackage():
+    courseId = request.form.get('courseId')
+    if not courseId:
+        return redirect(request.referrer)
+    get_storage().delete(f'package/{courseId}.zip')
+    update_db("update package set packaged=0 where courseId=?", [int(courseId)])
+    return redirect(request.referrer)
@@ -0,0 +1,156 @@
+import os
+import shutil
+import hashlib
+
+from flask import current_app
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class HashingReader:  # 读取时同步计算sha256及大小，避免二次读取
+    def __init__(self, stream):
+        self.stream = stream
+        self.sha = hashlib.sha256()
+        self.size = 0
+
+    def read(self, n=-1):
+        chunk = self.stream.read(n)
+        self.sha.update(chunk)
+        self.size += len(chunk)
+        return chunk
+
+
+class LocalStorage:  # 本地文件系统（static目录）
+    def __init__(self, root, url_prefix='/static/'):
+        self.root = root
+        self.url_prefix = url_prefix
+
+    def _path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    # 保存上传文件，返回(大小, 校验值)
+    def save(self, key, stream):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        reader = HashingReader(stream)
+        with open(path, 'wb') as f:
+            shutil.copyfileobj(reader, f, CHUNK_SIZE)
+        return reader.size, reader.sha.hexdigest()
+
+    # 将本地文件移入存储（打包结果）
+    def save_path(self, key, path):
+        dst = self._path(key)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        shutil.move(path, dst)
+
+    def open(self, key):
+        return open(self._path(key), 'rb')
+
+    def list(self, prefix):
+        base = self._path(prefix)
+        for path, dirnames, filenames in os.walk(base):
+            for filename in filenames:
+                yield os.path.relpath(os.path.join(path, filename), self.root).replace(os.sep, '/')
+
+    # 前缀下各文件的大小{key: size}
+    def sizes(self, prefix):
+        return dict((key, os.path.getsize(self._path(key))) for key in self.list(prefix))
+
+    def exists(self, key):
+        return os.path.isfile(self._path(key))
+
+    def delete(self, key):
+        if self.exists(key):
+            os.remove(self._path(key))
+
+    # 删除目录，返回是否存在过
+    def delete_prefix(self, prefix):
+        path = self._path(prefix)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+            return True
+        return False
+
+    def url(self, key):
+        return self.url_prefix + key
+
+    # 本地文件本身可直接访问
+    def presign(self, key, expires=3600):
+        return self.url(key)
+
+
+class S3Storage:  # S3兼容对象存储（AWS S3、MinIO等）
+    def __init__(self, bucket, endpoint_url=None, prefix='', public_url=None, client=None):
+        if client is None:
+            import boto3  # 仅在使用S3时加载
+            client = boto3.client('s3', endpoint_url=endpoint_url)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.public_url = public_url
+
+    def _key(self, key):
+        return self.prefix + key
+
+    def save(self, key, stream):
+        reader = HashingReader(stream)
+        self.client.upload_fileobj(reader, self.bucket, self._key(key))
+        return reader.size, reader.sha.hexdigest()
+
+    def save_path(self, key, path):
+        self.client.upload_file(path, self.bucket, self._key(key))
+        os.remove(path)
+
+    def open(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=self._key(key))['Body']
+
+    def list(self, prefix):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix + '/')):
+            for obj in page.get('Contents', []):
+                yield obj['Key'][len(self.prefix):]
+
+    def sizes(self, prefix):
+        result = {}
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix + '/')):
+            for obj in page.get('Contents', []):
+                result[obj['Key'][len(self.prefix):]] = obj['Size']
+        return result
+
+    def exists(self, key):
+        res = self.client.list_objects_v2(Bucket=self.bucket, Prefix=self._key(key), MaxKeys=1)
+        return any(obj['Key'] == self._key(key) for obj in res.get('Contents', []))
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def delete_prefix(self, prefix):
+        keys = [{'Key': self._key(key)} for key in self.list(prefix)]
+        for i in range(0, len(keys), 1000):
+            self.client.delete_objects(Bucket=self.bucket, Delete={'Objects': keys[i:i + 1000]})
+        return len(keys) > 0
+
+    # 未配置公开地址时经由/files跳转到临时签名地址（页面缓存中不保存会过期的链接）
+    def url(self, key):
+        if self.public_url:
+            return f"{self.public_url.rstrip('/')}/{self._key(key)}"
+        return '/files/' + key
+
+    def presign(self, key, expires=3600):
+        return self.client.generate_presigned_url('get_object', Params={'Bucket': self.bucket, 'Key': self._key(key)},
+                                                  ExpiresIn=expires)
+
+
+def init_app(app):
+    if app.config.get('STORAGE_BACKEND', 'local') == 's3':
+        storage = S3Storage(app.config['S3_BUCKET'], app.config.get('S3_ENDPOINT_URL'),
+                            app.config.get('S3_PREFIX', ''), app.config.get('S3_PUBLIC_URL'))
+    else:
+        storage = LocalStorage(app.static_folder)
+    app.extensions['storage'] = storage
+    app.jinja_env.globals['artifact_url'] = storage.url
+
+
+def get_storage():
+    return current_app.extensions['storage']
@@ -0,0 +1,219 @@
+import time
+
+from flask import Blueprint, render_template, request, redirect, session, jsonify, current_app
+
+from .db import get_db, query_db, update_db, bump_version
+from .utils import UPLOAD_FILES, encrypt, isLate, getCidByGid
+from .storage import get_storage
+from .media import PENDING
+
+bp = Blueprint('student', __name__)
+
+
+@bp.route('/toLogin')
+def toLogin():
+    result = {
+        'type': 0,  #
+        'info': ""
+    }
+    return render_template('login.html', result=result)
+
+
+@bp.route('/login', methods=['get', 'post'])
+def login():  # 登录请求
+    if request.method == 'GET':
+        return redirect('/toLogin')
+    else:
+        groupId = request.form.get('account')
+        password = request.form.get('password')
+        password = encrypt(password)  # 加密
+
+        user = query_db('select * from student where groupId=? and password=?',
+                        [groupId, password], one=True)
+        result = {
+            'type': 1,  # 学生登录
+            'info': "账号或密码错误"
+        }
+        if user is None:
+            return render_template('login.html', result=result)
+        else:   # 用户名及密码正确
+            courseId = getCidByGid(int(groupId))
+            if not isLate(courseId):    # 未截至
+                session['group_id'] = groupId
+                return render_template('change.html', member=user['member'].split('_'), project=user['project'], groupId=groupId)
+            else:
+                result['info'] = "已到截至日期"
+                return render_template('login.html', result=result)
+
+
+# 学生退出登录
+@bp.route('/logout', methods=['GET', 'POST'])
+def log_out():
+    if session.get('group_id'):
+        session.pop('group_id')
+    return redirect('/toLogin')
+
+
+@bp.route('/subStatus', methods=['GET', 'POST'])
+def subStatus():
+    groupId = request.args.get("groupId")
+    if groupId is None:
+        return jsonify(False)
+    sub = query_db("select groupId from submit where groupId=?", [int(groupId)], True)
+    if sub is None:
+        return jsonify(False)
+    return jsonify(True)
+
+
+@bp.route('/toUpload', methods=['post', 'get'])
+def to_upload():
+    if session.get('group_id'):
+        group_id = session.get('group_id')
+        courseId = getCidByGid(int(group_id))
+        res = query_db('select deadline from course where courseId=?', [int(courseId)], True)
+        my_time = time.localtime(res['deadline'])
+        res_time = [my_time.tm_year, my_time.tm_mon, my_time.tm_mday, my_time.tm_hour, my_time.tm_min]
+        return render_template('upload.html', group_id=group_id, time=res_time)
+    else:
+        return redirect('/toLogin')
+
+
+@bp.route('/upload', methods=['post', 'get'])
+def file_save():  # 上传作业
+    if request.method == 'POST':
+        group = request.form.get('group_id')
+        courseId = getCidByGid(int(group))  # 课程编号
+        if courseId is None:
+            return redirect('/toLogin')
+
+        storage = get_storage()
+        data = request.files
+        manifest = []
+        for field, fileName in UPLOAD_FILES:
+            file = data.get(field)
+            if file:
+                size, sha256 = storage.save(f'data/{courseId}/{group}/{fileName}', file.stream)
+                manifest.append((int(group), int(courseId), fileName, size, file.mimetype, sha256, int(round(time.time()))))
+
+        res = query_db("select groupId from submit where groupId=?", [int(group)], True)
+        db = get_db()
+        cur = get_db().cursor()
+        failed = False
+        try:
+            if res is None:
+                # 增加提交记录
+                cur.execute('insert into submit values (NULL, ?, ?, ?)', [int(group), int(courseId), int(round(time.time()))])
+            else:
+                cur.execute("update submit set subDate=? where groupId=?", [int(round(time.time())), int(group)])
+            # 记录文件清单
+            cur.executemany('''insert into manifest values (NULL, ?, ?, ?, ?, ?, ?, ?)
+                               on conflict(groupId, fileName) do update set size=excluded.size,
+                               contentType=excluded.contentType, sha256=excluded.sha256, saveDate=excluded.saveDate''', manifest)
+            # 修改提交状态
+            cur.execute("update student set submit='已提交' where groupId=?", [int(group)])
+            # 视频交由后台处理（faststart/转码）
+            video = [m for m in manifest if m[2] == 'main.mp4']
+            if video:
+                cur.execute('''insert into video values (?, ?, ?, ?, NULL)
+                               on conflict(groupId) do update set source=excluded.source, status=excluded.status''',
+                            [int(group), int(courseId), video[0][5], PENDING])
+            bump_version(cur, courseId, menu=res is None)
+            db.commit()
+            if video:
+                current_app.extensions['video_wakeup'].set()
+        except Exception as e:
+            db.rollback()
+            failed = True
+            # 文件已被覆盖，删除其旧的清单及视频记录（打包时重新计算校验值）
+            fileNames = [m[2] for m in manifest]
+            cur.executemany("delete from manifest where groupId=? and fileName=?", [(int(group), f) for f in fileNames])
+            if 'main.mp4' in fileNames:
+                cur.execute("delete from video where groupId=?", [int(group)])
+            db.commit()
+        finally:
+            cur.close()
+            if failed:
+                return redirect('/receipt?failed=1')
+            return redirect('/receipt')  # 重定向到提交回执（可再跳转展示界面）
+    else:
+        return redirect('/toLogin')
+
+
+@bp.route('/receipt')
+def receipt():  # 提交回执（文件清单）
+    if not session.get('group_id'):
+        return redirect('/toLogin')
+    groupId = session.get('group_id')
+    courseId = getCidByGid(int(groupId))
+    if courseId is None:
+        return redirect('/toLogin')
+    files = query_db('select courseId,fileName,size,contentType,sha256,saveDate from manifest where groupId=? order by fileName',
+                     [int(groupId)])
+    for f in files:
+        f['saveDate'] = time.strftime("%Y/%m/%d %X", time.localtime(f['saveDate']))
+    video = query_db('select status from video where groupId=?', [int(groupId)], True)
+    return render_template('receipt.html', groupId=groupId, courseId=courseId, files=files,
+                           videoStatus=video['status'] if video else '', failed=request.args.get('failed'))
+
+
+@bp.route('/reset', methods=['post'])
+def reset():  # 修改密码
+    groupId = request.form.get('groupId')
+    oldPassword = request.form.get('oldPassword')
+    newPassword = request.form.get('newPassword')
+    res = None
+    result = {
+        'type': 3,  # 重置密码
+        'info': "账号或密码错误"
+    }
+    try:
+        res = query_db("select password from student where groupId=?", [int(groupId)], True)
+    except Exception as e:
+        result['info'] = "非法字符"
+        return render_template('login.html', result=result)
+    if res is None:
+        result['info'] = '该用户不存在'
+        return render_template('login.html', result=result)
+    if res['password'] != encrypt(oldPassword):
+        result['info'] = '原密码错误'
+        return render_template('login.html', result=result)
+    update_db("update student set password=? where groupId=?", [encrypt(newPassword), int(groupId)])
+    result['info'] = '密码修改成功'
+    return render_template('login.html', result=result)
+
+
+@bp.route('/infoReset', methods=['get', 'post'])
+def InfoReset():  # 重定向到修改小组信息页面（附带小组信息）
+    if session.get("group_id"):
+        groupId = session.get("group_id")
+        student = query_db("select member,project from student where groupId=?", [int(groupId)], True)
+        if student is None:
+            return redirect('/toLogin')
+        return render_template('change.html', member=student['member'].split('_'), project=student['project'], groupId=groupId)
+    else:
+        return redirect("/toLogin")
+
+
+@bp.route('/resetInfo', methods=['post'])
+def Info_Reset():  # 修改小组信息
+    if not session.get("group_id"):
+        return redirect("/toLogin")
+    project = request.form.get('project')
+    groupId = request.form.get('groupId')
+
+    member_lst = [request.form.get('headMan'), request.form.get('member1'), request.form.get('member2'), request.form.get('member3')]
+    while '' in member_lst:
+        member_lst.remove('')
+    member = '_'.join(member_lst)
+    db = get_db()
+    cur = db.cursor()
+    try:
+        cur.execute("update student set project=?,member=? where groupId=?", [project, member, int(groupId)])
+        bump_version(cur, getCidByGid(int(groupId)))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+    finally:
+        cur.close()
+
+    return redirect('/toUpload')
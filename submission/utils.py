@@ -0,0 +1,79 @@
+import time
+import hashlib
+
+from flask import session
+
+from .db import query_db
+
+# 上传字段及其保存的文件名
+UPLOAD_FILES = [('video', 'main.mp4'), ('ppt', 'report.pptx'), ('report', 'report.pdf'),
+                ('code', 'code.zip'), ('picture', 'main.png')]
+
+
+# 密码进行md5加密
+def encrypt(password):
+    return hashlib.md5(password.encode('utf-8')).hexdigest()
+
+
+# 全部已提交课程（id+name）
+def getAllSubCourses():
+    results = query_db('select distinct courseId from submit')
+    for res in results:
+        res['courseName'] = getCourseNameById(res['courseId'])
+    return results
+
+
+# 截至日期判断
+def isLate(courseId):
+    res = query_db('select deadline from course where courseId=?', [int(courseId)], True)
+    if res is None:
+        return True
+    elif res['deadline'] <= int(round(time.time())):
+        return True
+    else:
+        return False
+
+
+# 根据课程id获取课程名称
+def getCourseNameById(courseId):
+    course = query_db("select courseName from course where courseId=?", [courseId], True)
+    if course is None:
+        return ''
+    return course['courseName']
+
+
+# 根据小组id获取课程id
+def getCidByGid(groupId):
+    res = query_db('select courseId from student where groupId=?', [groupId], True)
+    return res['courseId'] if res else None
+
+
+# 管理员登录判断
+def admin_is_login():
+    if session.get('admin_id'):
+        return True
+    else:
+        return False
+
+
+# 获取课程菜单
+def getMenu(allMenu=True):
+    menu = {}
+    if allMenu:
+        courses = query_db("select * from course where list='已导入'")
+    else:
+        courses = query_db("select * from course where courseId in (select distinct courseId from student where submit='已提交')")
+    for course in courses:
+        schoolYear = course['schoolYear']
+        term = course['term']
+        key = ''.join([str(schoolYear), '年第', str(term), '学期'])
+        elem = (course['courseId'], course['courseName'])
+        if menu.get(key):
+            temp = menu.get(key)
+            temp.append(elem)
+            menu[key] = temp
+        else:
+            menu[key] = [elem]
+    for key, item in menu.items():
+        menu[key] = item[::-1]
+    return menu
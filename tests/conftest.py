@@ -0,0 +1,38 @@
+import os
+import sys
+import shutil
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def database(tmp_path):
+    # 使用数据库副本，避免修改仓库中的submission.db
+    path = tmp_path / 'submission.db'
+    shutil.copy(os.path.join(ROOT, 'submission.db'), path)
+    return str(path)
+
+
+@pytest.fixture
+def app(database, tmp_path, monkeypatch):
+    from submission import db, gallery, media, packaging, admin, create_app
+    from submission.storage import LocalStorage
+    for module in (db, media, packaging, admin):
+        monkeypatch.setattr(module, 'DATABASE', database)
+    monkeypatch.setenv('FLASK_VIDEO_WORKERS', '0')
+    # 不预热，避免后台线程与断言竞争
+    monkeypatch.setattr(gallery, 'warm_page_cache', lambda app: None)
+    app = create_app()
+    app.extensions['storage'] = LocalStorage(str(tmp_path / 'static'))
+    return app
+
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s['admin_id'] = 'admin'
+    return client
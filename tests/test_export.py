@@ -0,0 +1,50 @@
+import io
+import csv
+import sqlite3
+
+import pytest
+
+from submission import admin
+
+
+def read_csv(resp):
+    body = resp.get_data()
+    assert body.startswith(b'\xef\xbb\xbf')
+    return list(csv.reader(io.StringIO(body.decode('utf-8-sig'))))
+
+
+def course_groups(database, courseIds):
+    conn = sqlite3.connect(database)
+    rows = conn.execute(f"select groupId from student where courseId in ({','.join('?' * len(courseIds))}) order by groupId",
+                        courseIds).fetchall()
+    conn.close()
+    return [str(r[0]) for r in rows]
+
+
+def test_export_requires_admin(app):
+    assert app.test_client().get('/export?courseId=1001').status_code == 302
+
+
+def test_export_csv_pages_across_batches(admin_client, database, monkeypatch):
+    monkeypatch.setattr(admin, 'EXPORT_BATCH', 3)
+    rows = read_csv(admin_client.get('/export?courseId=1001&courseId=1002'))
+    assert rows[0] == admin.EXPORT_COLUMNS
+    assert [r[0] for r in rows[1:]] == course_groups(database, [1001, 1002])
+    assert {r[1] for r in rows[1:]} == {'1001', '1002'}
+
+
+def test_export_sizes_fall_back_to_storage(app, admin_client, database):
+    groupId = course_groups(database, [1001])[0]
+    app.extensions['storage'].save(f'data/1001/{groupId}/main.mp4', io.BytesIO(b'x' * 42))
+    rows = read_csv(admin_client.get('/export?courseId=1001'))
+    row = dict(zip(rows[0], next(r for r in rows[1:] if r[0] == groupId)))
+    assert row['videoSize'] == '42'
+    assert row['pptSize'] == ''
+
+
+def test_export_parquet(admin_client, database):
+    pq = pytest.importorskip('pyarrow.parquet')
+    resp = admin_client.get('/export?courseId=1001&format=parquet')
+    table = pq.read_table(io.BytesIO(resp.get_data()))
+    assert table.column_names == admin.EXPORT_COLUMNS
+    assert [str(g) for g in table.column('groupId').to_pylist()] == course_groups(database, [1001])
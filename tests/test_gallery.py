@@ -0,0 +1,43 @@
+import pytest
+
+from submission import gallery
+
+
+@pytest.fixture
+def client(app):
+    gallery.page_cache.clear()
+    return app.test_client()
+
+
+def test_unknown_course_is_not_cached(client):
+    assert client.get('/home?course=999999').status_code == 302
+    assert client.get('/home?course=abc').status_code == 302
+    assert ('home', '999999') not in gallery.page_cache
+
+
+def test_course_page_is_cached_and_compressed(client):
+    resp = client.get('/home?course=1001', headers={'Accept-Encoding': 'gzip'})
+    assert resp.status_code == 200
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert ('home', '1001') in gallery.page_cache
+    assert client.get('/home?course=1001', headers={'If-None-Match': resp.headers['ETag']}).status_code == 304
+
+
+def test_page_cache_is_bounded(client, monkeypatch):
+    monkeypatch.setattr(gallery, 'PAGE_CACHE_SIZE', 2)
+    for i in range(5):
+        gallery.cached_page(('home', str(i)), '0', lambda: 'page')
+    assert list(gallery.page_cache) == [('home', '3'), ('home', '4')]
+
+
+def test_files_redirect_with_local_storage(app):
+    resp = app.test_client().get('/files/data/1001/2001/main.mp4')
+    assert resp.status_code == 302
+    assert resp.location.endswith('/static/data/1001/2001/main.mp4')
+
+
+def test_etag_follows_rendered_content(client):
+    first = gallery.cached_page(('home', 'x'), '0', lambda: 'old template')
+    gallery.page_cache.clear()
+    second = gallery.cached_page(('home', 'x'), '0', lambda: 'new template')
+    assert first['etag'] != second['etag']
@@ -0,0 +1,110 @@
+import io
+import sqlite3
+import struct
+
+import pytest
+
+from submission import db, media
+from submission.storage import LocalStorage
+
+
+def box(btype, payload):
+    return struct.pack('>I4s', 8 + len(payload), btype) + payload
+
+
+def large_box(btype, payload):
+    return struct.pack('>I4sQ', 1, btype, 16 + len(payload)) + payload
+
+
+def chunk_offsets(btype, offsets):
+    fmt = '>I' if btype == b'stco' else '>Q'
+    return box(btype, b'\0\0\0\0' + struct.pack('>I', len(offsets)) + b''.join(struct.pack(fmt, o) for o in offsets))
+
+
+def trak(table):
+    return box(b'trak', box(b'mdia', box(b'minf', box(b'stbl', table))))
+
+
+# ftyp + mdat(64位大小) + moov（stco、co64各一个trak）
+def moov_at_end():
+    ftyp = box(b'ftyp', b'isom\0\0\0\0isom')
+    mdat = large_box(b'mdat', b'AAAA' + b'BBBB' + b'CCCC')
+    start = len(ftyp) + 16
+    offsets = [start, start + 4, start + 8]
+    moov = box(b'moov', trak(chunk_offsets(b'stco', offsets[:2])) + trak(chunk_offsets(b'co64', offsets[2:])))
+    return ftyp + mdat + moov, offsets
+
+
+def read_offsets(data):
+    result = []
+    for btype, fmt, width in ((b'stco', '>I', 4), (b'co64', '>Q', 8)):
+        pos = data.index(btype)
+        count = struct.unpack_from('>I', data, pos + 8)[0]
+        result += [struct.unpack_from(fmt, data, pos + 12 + i * width)[0] for i in range(count)]
+    return result
+
+
+def test_faststart_moves_moov_and_keeps_chunks(tmp_path):
+    data, offsets = moov_at_end()
+    src, dst = tmp_path / 'in.mp4', tmp_path / 'out.mp4'
+    src.write_bytes(data)
+    assert media.faststart(str(src), str(dst)) is True
+
+    out = dst.read_bytes()
+    assert len(out) == len(data)
+    assert out.index(b'moov') < out.index(b'mdat')
+    new_offsets = read_offsets(out)
+    assert [out[o:o + 4] for o in new_offsets] == [data[o:o + 4] for o in offsets]
+
+
+def test_faststart_already_optimized(tmp_path):
+    data, _ = moov_at_end()
+    src, dst, again = tmp_path / 'in.mp4', tmp_path / 'out.mp4', tmp_path / 'again.mp4'
+    src.write_bytes(data)
+    media.faststart(str(src), str(dst))
+    assert media.faststart(str(dst), str(again)) is False
+
+
+@pytest.fixture
+def video_env(tmp_path, database, monkeypatch):
+    monkeypatch.setattr(db, 'DATABASE', database)
+    monkeypatch.setattr(media, 'DATABASE', database)
+    db.init_db()
+    conn = sqlite3.connect(database)
+    conn.execute("insert into video values (2001, 1001, 'src', ?, NULL)", [media.PENDING])
+    conn.commit()
+    conn.close()
+    return LocalStorage(str(tmp_path / 'static'))
+
+
+def run_video(storage, database, data):
+    storage.save('data/1001/2001/main.mp4', io.BytesIO(data))
+    media.process_video(storage, 1001, 2001, 'src')
+    conn = sqlite3.connect(database)
+    status = conn.execute('select status from video where groupId=2001').fetchone()[0]
+    conn.close()
+    return status
+
+
+def test_process_video_optimized(video_env, database):
+    data, _ = moov_at_end()
+    assert run_video(video_env, database, data) == media.OPTIMIZED
+    assert video_env.exists(media.mediaKey(1001, 2001, 'src'))
+
+
+def test_process_video_truncated_stco(video_env, database):
+    ftyp = box(b'ftyp', b'isom\0\0\0\0isom')
+    # stco只有版本字段，缺少条目数
+    moov = box(b'moov', box(b'trak', box(b'mdia', box(b'minf', box(b'stbl', box(b'stco', b'\0\0\0\0'))))))
+    assert run_video(video_env, database, ftyp + box(b'mdat', b'AAAA') + moov) == media.FAILED
+
+
+def test_process_video_truncated_file(video_env, database):
+    data, _ = moov_at_end()
+    assert run_video(video_env, database, data[:-10]) == media.FAILED
+
+
+def test_process_video_compressed_moov(video_env, database):
+    ftyp = box(b'ftyp', b'isom\0\0\0\0isom')
+    moov = box(b'moov', box(b'cmov', b'\0' * 16))
+    assert run_video(video_env, database, ftyp + box(b'mdat', b'AAAA') + moov) == media.FAILED
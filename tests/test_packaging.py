@@ -0,0 +1,68 @@
+import io
+import os
+import hashlib
+import sqlite3
+import tempfile
+import zipfile
+
+import pytest
+
+from submission import db, packaging
+from submission.storage import LocalStorage
+
+
+@pytest.fixture
+def env(tmp_path, database, monkeypatch):
+    monkeypatch.setattr(db, 'DATABASE', database)
+    monkeypatch.setattr(packaging, 'DATABASE', database)
+    db.init_db()
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path / 'tmp'))
+    os.makedirs(tempfile.tempdir)
+    return LocalStorage(str(tmp_path / 'static')), sqlite3.connect(database)
+
+
+def test_sha256sums_includes_files_missing_from_manifest(env):
+    storage, conn = env
+    size, sha256 = storage.save('data/1001/2001/main.mp4', io.BytesIO(b'recorded'))
+    conn.execute("insert into manifest values (NULL, 2001, 1001, 'main.mp4', ?, 'video/mp4', ?, 0)", [size, sha256])
+    conn.commit()
+    storage.save('data/1001/2002/report.pdf', io.BytesIO(b'legacy'))
+
+    assert packaging.claim_package(1001, 'node')
+    packaging.package(storage, 1001, 'node')
+
+    with storage.open('package/1001.zip') as f:
+        sums = zipfile.ZipFile(f).read('SHA256SUMS').decode()
+    legacy = hashlib.sha256(b'legacy').hexdigest()
+    assert sums == f'{sha256}  2001/main.mp4\n{legacy}  2002/report.pdf\n'
+    assert conn.execute("select sha256 from manifest where groupId=2002 and fileName='report.pdf'").fetchone() == (legacy,)
+    assert conn.execute('select packaged from package where courseId=1001').fetchone() == (1,)
+
+
+def test_lost_lease_stops_packing(env):
+    storage, conn = env
+    storage.save('data/1001/2001/main.mp4', io.BytesIO(b'x'))
+    assert packaging.claim_package(1001, 'node')
+    conn.execute("update package_lease set owner='other' where courseId=1001")
+    conn.commit()
+
+    packaging.package(storage, 1001, 'node')
+    assert not storage.exists('package/1001.zip')
+    assert conn.execute('select owner from package_lease where courseId=1001').fetchone() == ('other',)
+    assert os.listdir(tempfile.tempdir) == []
+
+
+def test_failed_packing_cleans_up(env):
+    storage, conn = env
+    storage.save('data/1001/2001/main.mp4', io.BytesIO(b'x'))
+
+    class Broken(LocalStorage):
+        def open(self, key):
+            raise OSError('read failed')
+
+    assert packaging.claim_package(1001, 'node')
+    with pytest.raises(OSError):
+        packaging.package(Broken(storage.root), 1001, 'node')
+    assert os.listdir(tempfile.tempdir) == []
+    assert conn.execute('select packaged from package where courseId=1001').fetchone() == (2,)
+    assert conn.execute('select * from package_lease').fetchall() == []
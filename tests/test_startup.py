@@ -0,0 +1,37 @@
+import os
+import json
+import subprocess
+import sys
+
+from conftest import ROOT
+
+STARTUP_LIMIT = 1.0
+
+SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+import app
+print(json.dumps({'seconds': time.perf_counter() - start,
+                  'modules': [m for m in ('pandas', 'numpy') if m in sys.modules]}))
+'''
+
+
+def test_import_app_is_fast_and_lazy(database):
+    env = dict(os.environ, SUBMISSION_DB=database)
+    out = subprocess.run([sys.executable, '-c', SCRIPT], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    assert result['modules'] == []
+    assert result['seconds'] < STARTUP_LIMIT
+
+
+def test_background_threads_start_on_first_request(app, monkeypatch):
+    import threading
+    from submission import media
+    started = []
+    monkeypatch.setattr(media, 'start_workers', lambda app: started.append(threading.get_ident()))
+    assert started == []
+    client = app.test_client()
+    client.get('/toLogin')
+    client.get('/toLogin')
+    assert len(started) == 1
@@ -0,0 +1,70 @@
+import io
+import hashlib
+
+import pytest
+
+from submission.storage import LocalStorage, S3Storage
+
+
+@pytest.fixture(params=['local', 's3'])
+def storage(request, tmp_path):
+    if request.param == 'local':
+        yield LocalStorage(str(tmp_path))
+        return
+    boto3 = pytest.importorskip('boto3')
+    moto = pytest.importorskip('moto')
+    with moto.mock_aws():
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket='xai-submission')
+        yield S3Storage('xai-submission', client=client, prefix='xai/')
+
+
+def test_save_returns_size_and_sha256(storage):
+    data = b'main.mp4 content' * 1000
+    assert storage.save('data/1001/1/main.mp4', io.BytesIO(data)) == (len(data), hashlib.sha256(data).hexdigest())
+    with storage.open('data/1001/1/main.mp4') as f:
+        assert f.read() == data
+
+
+def test_list_and_exists(storage):
+    for key in ('data/1001/1/main.mp4', 'data/1001/2/main.png', 'data/100/3/main.mp4'):
+        storage.save(key, io.BytesIO(b'x'))
+    assert sorted(storage.list('data/1001')) == ['data/1001/1/main.mp4', 'data/1001/2/main.png']
+    assert storage.exists('data/1001/1/main.mp4')
+    assert not storage.exists('data/1001/1/main')
+    assert not storage.exists('data/1001/1/report.pdf')
+
+
+def test_delete_prefix_matches_whole_segment(storage):
+    storage.save('data/100/1/main.mp4', io.BytesIO(b'x'))
+    storage.save('data/1001/1/main.mp4', io.BytesIO(b'x'))
+    assert storage.delete_prefix('data/100') is True
+    assert not storage.exists('data/100/1/main.mp4')
+    assert storage.exists('data/1001/1/main.mp4')
+    assert storage.delete_prefix('data/100') is False
+
+
+def test_delete_and_save_path(storage, tmp_path):
+    path = tmp_path / 'pack.zip'
+    path.write_bytes(b'zip')
+    storage.save_path('package/1001.zip', str(path))
+    assert not path.exists()
+    assert storage.exists('package/1001.zip')
+    storage.delete('package/1001.zip')
+    assert not storage.exists('package/1001.zip')
+
+
+def test_url(storage):
+    if isinstance(storage, LocalStorage):
+        assert storage.url('data/1001/1/main.mp4') == '/static/data/1001/1/main.mp4'
+    else:
+        assert storage.url('data/1001/1/main.mp4') == '/files/data/1001/1/main.mp4'
+        storage.public_url = 'http://minio:9000/xai-submission/'
+        assert storage.url('data/1001/1/main.mp4') == 'http://minio:9000/xai-submission/xai/data/1001/1/main.mp4'
+
+
+def test_sizes(storage):
+    storage.save('data/1001/1/main.mp4', io.BytesIO(b'x' * 5))
+    storage.save('data/1001/1/main.png', io.BytesIO(b'y'))
+    storage.save('data/10011/1/main.mp4', io.BytesIO(b'z'))
+    assert storage.sizes('data/1001/1') == {'data/1001/1/main.mp4': 5, 'data/1001/1/main.png': 1}
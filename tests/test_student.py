@@ -0,0 +1,47 @@
+import io
+import sqlite3
+
+from submission import student
+
+
+def upload(client, groupId, content):
+    with client.session_transaction() as s:
+        s['group_id'] = str(groupId)
+    return client.post('/upload', data={'group_id': str(groupId),
+                                        'report': (io.BytesIO(content), 'report.pdf', 'application/pdf')})
+
+
+def manifest(database, groupId):
+    with sqlite3.connect(database) as db:
+        return db.execute("select fileName, size from manifest where groupId=?", [groupId]).fetchall()
+
+
+def test_receipt_unknown_group_redirects(app):
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s['group_id'] = '999999'
+    res = client.get('/receipt')
+    assert res.status_code == 302
+    assert res.headers['Location'].endswith('/toLogin')
+
+
+def test_upload_records_manifest(app, database):
+    client = app.test_client()
+    res = upload(client, 2001, b'report')
+    assert res.headers['Location'].endswith('/receipt')
+    assert manifest(database, 2001) == [('report.pdf', 6)]
+    assert b'report.pdf' in client.get('/receipt').data
+
+
+def test_failed_upload_drops_stale_manifest(app, database, monkeypatch):
+    client = app.test_client()
+    upload(client, 2001, b'report')
+
+    def fail(*args, **kwargs):
+        raise sqlite3.OperationalError('locked')
+
+    monkeypatch.setattr(student, 'bump_version', fail)
+    res = upload(client, 2001, b'new report')
+    assert res.headers['Location'].endswith('/receipt?failed=1')
+    assert manifest(database, 2001) == []
+    assert '提交失败'.encode() in client.get('/receipt?failed=1').data